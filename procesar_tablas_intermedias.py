@@ -6,8 +6,22 @@ La función principal, `procesar_tablas_intermedias`, vincula todos los pasos de
 """
 
 import argparse
+import json
+import numpy as np
 import pandas as pd
 
+NS_POR_DIA = 86_400_000_000_000
+
+def fecha_en_ms(fecha):
+    """
+    Retorna los ms de un objeto {'$date': {'$numberLong': '`<ms>`'}} o -1 si la fecha es nula
+    o el objeto no tiene ese formato
+    """
+    try:
+        return int(fecha['$date']['$numberLong'])
+    except (KeyError, TypeError, ValueError):
+        return -1
+
 def obtener_fecha(data_frame, col_name):
     """
     Convierte Unix (Epoch) UTC timestamps en ms a pandas datetime.
@@ -17,78 +31,86 @@ def obtener_fecha(data_frame, col_name):
     col_name (str): Nombre de la columna de df con fechas
 
     datecol (pandas.Series): Serie de pandas con las fechas en formato pandas datetime.
+    Las fechas nulas, con otro formato o fuera del rango de pandas quedan como NaT.
 
-    >>> df = pd.DataFrame({'fecha': [{'$date': {'$numberLong': '1613148710000'}}]})
+    >>> df = pd.DataFrame({'fecha': [{'$date': {'$numberLong': '1613148710000'}},
+    ...                              {'$date': {'$numberLong': '253402300799000'}},
+    ...                              {'$date': {}}, None]})
     >>> obtener_fecha(df, 'fecha')
     0   2021-02-12 16:51:50
-    Name: $numberLong, dtype: datetime64[ns]
+    1                   NaT
+    2                   NaT
+    3                   NaT
+    Name: fecha, dtype: datetime64[ns]
     """
-    date_col = data_frame[col_name].apply(object_to_series)['$date'].apply(object_to_series)
-    date_col = pd.to_datetime(date_col['$numberLong'], unit='ms', errors = 'coerce')
-    return date_col
+    # Las fechas nulas se marcan con -1 para poder convertir todo como un arreglo int64
+    valores_ms = np.fromiter((fecha_en_ms(fecha) for fecha in data_frame[col_name]),
+                             dtype=np.int64, count=len(data_frame))
+    date_col = pd.to_datetime(valores_ms, unit='ms', errors='coerce').where(valores_ms != -1)
+    return pd.Series(date_col, index=data_frame.index, name=col_name)
 
-def object_to_series(obj):
+def expandir_objetos(serie, columnas):
     """
-    Metodo para convertir un objeto en una serie para que cada atributo sea una columna
-    en un df
+    Convierte una serie de objetos en un df donde cada atributo en `columnas` es una columna.
+    Los atributos se leen de cada objeto con get.
+    Los valores que no son objetos (nulos) o los atributos que no existen quedan nulos.
     """
-    return pd.Series(obj, dtype='object')
+    return pd.DataFrame({col: [obj.get(col) if isinstance(obj, dict) else None for obj in serie]
+                         for col in columnas}, index=serie.index)
 
-# Diccionario para el reporte de los IDs que se han borrado en el proceso de ETL por ser nulos
-nan_info = {}
-dup_info = {}
+def leer_documentos_karen(archivo_json, columnas):
+    """
+    Lee un archivo JSON exportado de Karen (lista de documentos) y retorna un df
+    con un documento por fila, indexado por 'id' (el '$oid' de '_id')
+    Solo se conservan los objetos en `columnas`, el resto de cada documento no se
+    convierte al df
+    """
+    with open(archivo_json, "r", encoding='utf-8') as file:
+        documentos = json.load(file)
+    ids = [documento['_id']['$oid'] for documento in documentos]
+    registros = [[documento.get(col) for col in columnas] for documento in documentos]
+    del documentos
+    return pd.DataFrame.from_records(registros, columns=columnas,
+                                     index=pd.Index(ids, name='id'))
 
-def remover_nan(data_frame, nombre_df):
+def remover_nan(data_frame, nombre_df, reporte):
     """
     Verifica que cada df no tenga columnas vacias y si las tiene elimina los datos 
-    Registra los ids eliminados en un objeto global
-    """
-    global nan_info
-    if nombre_df not in nan_info:
-        nan_info[nombre_df] = {}
-    for col in data_frame.columns:
-        nan_indices = data_frame[data_frame[col].isna()].index
-        if not nan_indices.empty:
-            nan_info[nombre_df][col] = nan_indices.tolist()
-            data_frame = data_frame.dropna(subset=[col])
-    return data_frame
+    Escribe los ids eliminados en el archivo de reporte
+    """
+    nulos = data_frame.isna().to_numpy()
+    # En el caso comun no hay nulos y el df se devuelve sin recorrer las columnas
+    columnas_con_nulos = nulos.any(axis=0)
+    if not columnas_con_nulos.any():
+        return data_frame
+    eliminados = np.zeros(len(data_frame), dtype=bool)
+    for i in np.flatnonzero(columnas_con_nulos):
+        col = data_frame.columns[i]
+        # Cada fila se reporta solo en la primera columna nula por la que se elimina
+        nan_indices = nulos[:, i] & ~eliminados
+        if nan_indices.any():
+            reporte.write(f"Para la tabla '{nombre_df}', en la columna '{col}',")
+            reporte.write(" se eliminaron las siguientes filas debido a valores NaN:\n")
+            reporte.writelines(f"id: {record}\n" for record in data_frame.index[nan_indices])
+            eliminados |= nan_indices
+    return data_frame[~eliminados]
 
-def remover_duplicados(data_frame, nombre_df):
+def remover_duplicados(data_frame, nombre_df, reporte):
     """
     Remueve los datos que tengan la misma informacion de identificacion 
     Iden_Sede e Iden_Codigo
+    Escribe los ids eliminados en el archivo de reporte
     """
-    global dup_info
-    if nombre_df not in dup_info:
-        dup_info[nombre_df] = {}
-    indice_duplicados = data_frame.duplicated(subset=['Iden_Sede','Iden_Codigo'], keep=False)
-    if not indice_duplicados.empty:
-        dup_info[nombre_df] = data_frame[indice_duplicados]['Paciente_ID'].tolist()
+    tamano_grupos = (data_frame.groupby(['Iden_Sede','Iden_Codigo'], sort=False, dropna=False)
+                     ['Iden_Sede'].transform('size'))
+    indice_duplicados = tamano_grupos.to_numpy() > 1
+    reporte.write(f"Para la tabla '{nombre_df}' se eliminaron las siguientes filas")
+    reporte.write(" debido a valores de 'Iden_Sede','Iden_Codigo' duplicados \n")
+    reporte.writelines(f"id: {record}\n"
+                       for record in data_frame.loc[indice_duplicados, 'Paciente_ID'])
     return data_frame[~indice_duplicados]
 
 
-def create_report():
-    """
-    Crea un reporte de las variables que se eliminaron
-   """
-    global nan_info
-    global dup_info
-    with open("reporte.txt", "w", encoding='utf-8') as file:
-        file.write("Filas eliminadas por valores nulos:\n")
-        for table_name, columns in nan_info.items():
-            for column_name, records in columns.items():
-                file.write(f"Para la tabla '{table_name}', en la columna '{column_name}',")
-                file.write(" se eliminaron las siguientes filas debido a valores NaN:\n")
-                for record in records:
-                    file.write(f"id: {record}\n")
-        file.write("Filas eliminadas por valores duplicados:\n")
-        for table_name, records in dup_info.items():
-            file.write(f"Para la tabla '{table_name}' se eliminaron las siguientes filas")
-            file.write(" debido a valores de 'Iden_Sede','Iden_Codigo' duplicados \n")
-            for record in records:
-                file.write(f"id: {record}\n")
-
-
 def procesar_pacientes(archivo_pacientes):
     """
     Procesa el objeto principal que contiene la información por cada paciente y retorna un df
@@ -99,39 +121,38 @@ def procesar_pacientes(archivo_pacientes):
     - 'Identificacion'
     - 'HospitalizacionDiagnostico'
     """
-    pacientes = pd.read_json(archivo_pacientes)
-    pacientes = pd.concat([pacientes.drop(['_id'], axis=1), pacientes['_id']
-                                    .apply(object_to_series)
-                          ], axis=1).rename(columns={"$oid": "id"}).set_index('id')
-    return pacientes[['Pediatria',
-                      'Antropometria',
-                      'ExamenRecienNacido',
-                      'Identificacion',
-                      'HospitalizacionDiagnostico']]
+    return leer_documentos_karen(archivo_pacientes, ['Pediatria',
+                                                     'Antropometria',
+                                                     'ExamenRecienNacido',
+                                                     'Identificacion',
+                                                     'HospitalizacionDiagnostico'])
 
-def procesar_examen_recien_nacido(pacientes):
+def procesar_examen_recien_nacido(pacientes, reporte):
     """
     Procesa el objeto 'ExamenRecienNacido' que contiene 
       - ERN_Talla: talla del paciente en cm, medido al nacer,
       - ERN_PC: peso del paciente en gramos, medido al nacer,
     """
-    examen_rn = pacientes['ExamenRecienNacido'].apply(object_to_series)
-    examen_rn = examen_rn[['ERN_Talla','ERN_PC']]
-    examen_rn = remover_nan(examen_rn, 'ExamenRecienNacido')
+    examen_rn = expandir_objetos(pacientes['ExamenRecienNacido'], ['ERN_Talla','ERN_PC'])
+    examen_rn = remover_nan(examen_rn, 'ExamenRecienNacido', reporte)
+    examen_rn = examen_rn.astype({'ERN_Talla': 'float64', 'ERN_PC': 'float64'})
     return examen_rn
 
-def procesar_hosp_diagnostico(pacientes):
+def procesar_hosp_diagnostico(pacientes, reporte):
     """
     Procesa el objeto 'HospitalizacionDiagnostico' que contiene 
       - HD_TotalDiasHospital: dias que estuvo el niño hospitalizado
     """
-    hospitalizacion_diag = pacientes['HospitalizacionDiagnostico'].apply(object_to_series)
-    hospitalizacion_diag = hospitalizacion_diag[['HD_TotalDiasHospital']]
-    hospitalizacion_diag = remover_nan(hospitalizacion_diag, 'HospitalizacionDiagnostico')
+    hospitalizacion_diag = expandir_objetos(pacientes['HospitalizacionDiagnostico'],
+                                            ['HD_TotalDiasHospital'])
+    # Los valores que no son numericos quedan nulos y se reportan en remover_nan
+    hospitalizacion_diag['HD_TotalDiasHospital'] = pd.to_numeric(
+        hospitalizacion_diag['HD_TotalDiasHospital'], errors='coerce')
+    hospitalizacion_diag = remover_nan(hospitalizacion_diag, 'HospitalizacionDiagnostico', reporte)
     return hospitalizacion_diag
 
 
-def procesar_antropometrias(pacientes):
+def procesar_antropometrias(pacientes, reporte):
     """
     Procesa el objeto 'Antropometria' que contiene 
       - V_id: número de la antropometría por paciente 
@@ -140,52 +161,73 @@ def procesar_antropometrias(pacientes):
       - AN_Peso: peso del paciente en gramos, medido en la antropometría,
       -	AN_PC: perímetro cefálico del paciente en cm, medido en la antropometría,
     """
-    antropometrias = pacientes['Antropometria'].explode().apply(object_to_series)
+    ids, registros = [], []
+    for paciente_id, lista_ant in pacientes['Antropometria'].items():
+        # Un paciente sin antropometrias queda con una fila vacia que se reporta en remover_nan
+        if not isinstance(lista_ant, list) or not lista_ant:
+            lista_ant = [{}]
+        ids.extend([paciente_id] * len(lista_ant))
+        # Los elementos que no son objetos quedan como filas vacias y se reportan en remover_nan
+        registros.extend(ant if isinstance(ant, dict) else {} for ant in lista_ant)
+    antropometrias = pd.DataFrame.from_records(registros,
+                                               index=pd.Index(ids, name=pacientes.index.name))
     antropometrias['AN_timestamp'] = obtener_fecha(antropometrias, 'AN_timestamp')
     antropometrias = antropometrias[['V_id', 'AN_timestamp', 'AN_Talla', 'AN_Peso', 'AN_PC']]
-    antropometrias = remover_nan(antropometrias, 'Antropometria')
+    antropometrias = remover_nan(antropometrias, 'Antropometria', reporte)
+    # Las medidas se dejan en float64 como los umbrales de las curvas, en float32 un valor
+    # igual a un umbral (ej. 45.6) queda por debajo de el al compararlos
+    antropometrias = antropometrias.astype({'V_id': 'int16', 'AN_Talla': 'float64',
+                                            'AN_Peso': 'float64', 'AN_PC': 'float64'})
     return antropometrias
 
-def procesar_e_gest_al_nacer(pacientes):
+def procesar_e_gest_al_nacer(pacientes, reporte):
     """
     Procesa el objeto 'EIP_EdadGestacionalAlNacer' que contiene 
     - EIP_EG_DiasTotales: Edad gestacional en dias
     - EIP_EG_Selecciono: Motivo de seleccion de la edad gestacional
     """
-    pediatria = pacientes['Pediatria'].apply(object_to_series)
-    e_inicial_pediatria = pediatria['ExamenInicialPediatria'].apply(object_to_series)
-    e_gest_nacer = e_inicial_pediatria['EIP_EdadGestacionalAlNacer'].apply(object_to_series)
-    e_gest_nacer = e_gest_nacer.drop([0], axis=1)
-    e_gest_nacer = e_gest_nacer[['EIP_EG_DiasTotales', 'EIP_EG_Selecciono']]
-    e_gest_nacer = remover_nan(e_gest_nacer, 'EIP_EG')
-    e_gest_nacer['EIP_EG_DiasTotales'] = e_gest_nacer['EIP_EG_DiasTotales'].astype('int')
+    columnas = ['EIP_EG_DiasTotales', 'EIP_EG_Selecciono']
+    registros = []
+    for pediatria in pacientes['Pediatria']:
+        try:
+            e_gest = pediatria['ExamenInicialPediatria']['EIP_EdadGestacionalAlNacer']
+        except (KeyError, TypeError):
+            e_gest = None
+        if not isinstance(e_gest, dict):
+            e_gest = {}
+        registros.append([e_gest.get(col) for col in columnas])
+    e_gest_nacer = pd.DataFrame.from_records(registros, columns=columnas, index=pacientes.index)
+    e_gest_nacer = remover_nan(e_gest_nacer, 'EIP_EG', reporte)
+    e_gest_nacer['EIP_EG_DiasTotales'] = pd.to_numeric(e_gest_nacer['EIP_EG_DiasTotales'],
+                                                       downcast='integer', errors='coerce')
     return e_gest_nacer
 
-def procesar_identidad(pacientes):
+def procesar_identidad(pacientes, reporte):
     """
     Procesa el objeto 'Identidad' que contiene 
       - Iden_Sexo: sexo del paciente 1 (niño) u 2 (niña), 3 indefinido
       - Iden_FechaParto: fecha en la que nació el paciente
       - Iden_PesoParto: eso del paciente en gramos, medido al nacer,
     """
-    iden = pacientes['Identificacion'].apply(pd.Series)
+    iden = expandir_objetos(pacientes['Identificacion'],
+                            ['Iden_FechaParto','Iden_PesoParto','Iden_Sexo', 'Iden_Sede'])
     iden['Iden_FechaParto'] = obtener_fecha(iden, 'Iden_FechaParto')
-    iden = iden[['Iden_FechaParto','Iden_PesoParto','Iden_Sexo', 'Iden_Sede']]
-    iden = remover_nan(iden, 'Identificacion')
+    iden = remover_nan(iden, 'Identificacion', reporte)
+    iden = iden.astype({'Iden_Sexo': 'int8', 'Iden_PesoParto': 'float64'})
     return iden
 
-def procesar_iden_codigo(archivo_codigo):
+def procesar_iden_codigo(archivo_codigo, reporte):
     """
     Procesa el objeto iden_codigo que se encuentra en un archivo aparte
     - Iden_Codigo: Codigo de paciente, se puede repetir por sede
     - Iden_Sede: Sede en la que se registro el paciente
     """
-    pacientes_id = pd.read_json(archivo_codigo)
-    pacientes_id = pd.concat([pacientes_id.drop(['_id'], axis=1), pacientes_id['_id']
-                                    .apply(object_to_series)
-                          ], axis=1).rename(columns={"$oid": "id"}).set_index('id')
-    pacientes_id = pacientes_id['Identificacion'].apply(object_to_series)
-    pacientes_id = remover_nan(pacientes_id, 'Identificacion')
+    pacientes_id = leer_documentos_karen(archivo_codigo, ['Identificacion'])
+    pacientes_id = expandir_objetos(pacientes_id['Identificacion'], ['Iden_Codigo', 'Iden_Sede'])
+    # Los codigos pueden venir como texto, los que no son numericos quedan nulos y se reportan
+    pacientes_id = pacientes_id.apply(pd.to_numeric, errors='coerce')
+    pacientes_id = remover_nan(pacientes_id, 'Identificacion', reporte)
+    pacientes_id = pacientes_id.apply(pd.to_numeric, downcast='integer')
     return pacientes_id
 
 def procesar_tabla_antropometrias_curvas(antropometrias, identidad, e_gest_nacer, examen_rn):
@@ -201,39 +243,38 @@ def procesar_tabla_antropometrias_curvas(antropometrias, identidad, e_gest_nacer
         de la antropometria mas la edad gestacional al nacer
      - Paciente_ID: Id del paciente al que se le tomo la antropometria
     """
-    datos_antropometria = (antropometrias
-                          .join(identidad[['Iden_FechaParto']], how='left')
-                          .join(e_gest_nacer[['EIP_EG_DiasTotales']], how='left'))
-    edad_dias_ant = ((datos_antropometria['AN_timestamp']- datos_antropometria['Iden_FechaParto'])
-                               .dt.days
-                              + datos_antropometria['EIP_EG_DiasTotales'])
-    datos_antropometria['Edad_Corregida_AT_Dias'] = edad_dias_ant
-    datos_antropometria_nacimiento = (identidad[['Iden_PesoParto']]
-                                    .join(e_gest_nacer[['EIP_EG_DiasTotales']], how='left')
-                                    .join(examen_rn[['ERN_Talla', 'ERN_PC']], how='left'))
-    datos_antropometria = datos_antropometria[['V_id',
-                                                'AN_Talla',
-                                                'AN_Peso',
-                                                'AN_PC',
-                                                'Edad_Corregida_AT_Dias']]
+    # La fecha de parto y la edad gestacional se alinean al indice de antropometrias
+    # Los dias desde el parto se calculan restando los int64 (ns) de las fechas
+    fecha_ant = antropometrias['AN_timestamp'].to_numpy(dtype='datetime64[ns]')
+    fecha_parto = (identidad['Iden_FechaParto'].reindex(antropometrias.index)
+                   .to_numpy(dtype='datetime64[ns]'))
+    edad_gestacional = (e_gest_nacer['EIP_EG_DiasTotales'].reindex(antropometrias.index)
+                        .to_numpy(dtype='float64'))
+    dias_desde_parto = (fecha_ant.view('i8') - fecha_parto.view('i8')) // NS_POR_DIA
+    dias_desde_parto = np.where(np.isnat(fecha_ant) | np.isnat(fecha_parto),
+                                np.nan, dias_desde_parto)
     # En vez de usar antropometria AN que viene de la base de datos se usa AC antropometria Curvas
-    datos_antropometria.rename(columns = {'AN_Talla' : 'AC_Talla',
-                                                  'AN_Peso': 'AC_Peso',
-                                                  'AN_PC': 'AC_PC',
-                                                  'V_id':'AC_Num',
-                                                  'Edad_Corregida_AT_Dias': 'AC_EG_Dias'}, 
-                                      inplace = True)
-    datos_antropometria_nacimiento.rename(columns = {'EIP_EG_DiasTotales':'AC_EG_Dias',
-                                                      'Iden_PesoParto': 'AC_Peso',
-                                                      'ERN_Talla': 'AC_Talla',
-                                                      'ERN_PC': 'AC_PC'},
-                                          inplace = True)
-    datos_antropometria_nacimiento['AC_Num'] = 0
-    datos_curvas = pd.concat([datos_antropometria, datos_antropometria_nacimiento])
-    datos_curvas = datos_curvas.reset_index().rename(columns={'id': 'Paciente_ID'})
+    datos_antropometria = pd.DataFrame({
+        'AC_Num': antropometrias['V_id'].to_numpy(),
+        'AC_Talla': antropometrias['AN_Talla'].to_numpy(),
+        'AC_Peso': antropometrias['AN_Peso'].to_numpy(),
+        'AC_PC': antropometrias['AN_PC'].to_numpy(),
+        'AC_EG_Dias': dias_desde_parto + edad_gestacional
+    }, index=antropometrias.index)
+    # La antropometria al nacer (AC_Num 0) sale de identidad, examen_rn y e_gest_nacer
+    indice_nacimiento = identidad.index
+    datos_antropometria_nacimiento = pd.DataFrame({
+        'AC_Num': np.zeros(len(indice_nacimiento), dtype=np.int8),
+        'AC_Talla': examen_rn['ERN_Talla'].reindex(indice_nacimiento).to_numpy(),
+        'AC_Peso': identidad['Iden_PesoParto'].to_numpy(),
+        'AC_PC': examen_rn['ERN_PC'].reindex(indice_nacimiento).to_numpy(),
+        'AC_EG_Dias': e_gest_nacer['EIP_EG_DiasTotales'].reindex(indice_nacimiento).to_numpy()
+    }, index=indice_nacimiento)
+    datos_curvas = pd.concat([datos_antropometria, datos_antropometria_nacimiento], copy=False)
+    datos_curvas = datos_curvas.rename_axis('Paciente_ID').reset_index()
     return datos_curvas
 
-def procesar_tabla_pacientes(identidad, iden_codigo, hosp_diagnostico):
+def procesar_tabla_pacientes(identidad, iden_codigo, hosp_diagnostico, reporte):
     """
     Crea una tabla con los pacientes sus datos de sexo y hospitalización
       - Iden_Sexo: 1 niño, 2 niña, 3 no definido
@@ -247,10 +288,10 @@ def procesar_tabla_pacientes(identidad, iden_codigo, hosp_diagnostico):
     datos_pacientes = datos_pacientes.join(hosp_diagnostico[['HD_TotalDiasHospital']], how='left')
     datos_pacientes = datos_pacientes.join(iden_codigo, how='left')
     datos_pacientes = datos_pacientes.reset_index().rename(columns={'id': 'Paciente_ID'})
-    datos_pacientes = remover_duplicados(datos_pacientes, 'datos_pacientes')
+    datos_pacientes = remover_duplicados(datos_pacientes, 'datos_pacientes', reporte)
     return datos_pacientes
 
-def procesar_destete_alimentacion(archivo_destete_alimentacion, tabla_pacientes):
+def procesar_destete_alimentacion(archivo_destete_alimentacion, tabla_pacientes, reporte):
     """
     Crea una tabla que une los datos de la tabla de pacientes con tabla de información 
     de destete de oxigeno y de alimentación 
@@ -263,25 +304,25 @@ def procesar_destete_alimentacion(archivo_destete_alimentacion, tabla_pacientes)
         'pesodesteteoxigeno','algoLM3meses','algoLM6meses','algoLM40sem','LME40',
         'LME3m','LME6m'
     """
-    destete_alimentacion = pd.read_excel(archivo_destete_alimentacion)
-    destete_alimentacion = destete_alimentacion.replace('#NULL!', None)
-    destete_alimentacion['Iden_Codigo'] = destete_alimentacion['Iden_Codigo'].astype(int)
-    destete_alimentacion['Iden_Sede'] = destete_alimentacion['Iden_Sede'].astype(int)
+    destete_alimentacion = pd.read_excel(archivo_destete_alimentacion, engine='calamine',
+                                         dtype={'Iden_Codigo': 'Int32', 'Iden_Sede': 'Int32'},
+                                         na_values=['#NULL!'])
 
-    tabla_pacientes['Iden_Codigo'] = tabla_pacientes['Iden_Codigo'].astype(int)
-    tabla_pacientes['Iden_Sede'] = tabla_pacientes['Iden_Sede'].astype(int)
+    tabla_pacientes = tabla_pacientes.assign(
+        Iden_Codigo=pd.to_numeric(tabla_pacientes['Iden_Codigo'], downcast='integer'),
+        Iden_Sede=pd.to_numeric(tabla_pacientes['Iden_Sede'], downcast='integer'))
 
-    tabla_pacientes_alim_ox = tabla_pacientes.merge(destete_alimentacion,
-                                                  left_on=['Iden_Codigo', 'Iden_Sede'],
-                                                  right_on=['Iden_Codigo', 'Iden_Sede'],
-                                                  how='left')
+    llaves = ['Iden_Codigo', 'Iden_Sede']
+    tabla_pacientes_alim_ox = (tabla_pacientes.set_index(llaves)
+                               .join(destete_alimentacion.set_index(llaves), how='left')
+                               .reset_index())
     tabla_pacientes_alim_ox = tabla_pacientes_alim_ox[['Iden_Sexo', 'HD_TotalDiasHospital',
                                                        'Iden_Sede', 'Iden_Codigo',
                                                        'edaddestete', 'oxigenoalaentrada',
                                                        'pesodesteteoxigeno', 'algoLM3meses',
                                                        'algoLM6meses','algoLM40sem','LME40',
                                                        'LME3m','LME6m','Paciente_ID']]
-    tabla_pacientes_alim_ox = remover_duplicados(tabla_pacientes_alim_ox, 'tabla_pacientes_alim_ox')
+    tabla_pacientes_alim_ox = remover_duplicados(tabla_pacientes_alim_ox, 'tabla_pacientes_alim_ox', reporte)
     return tabla_pacientes_alim_ox
 
 def procesar_tablas_intermedias(archivo_pacientes, archivo_codigo, archivo_destete_alim):
@@ -290,33 +331,40 @@ def procesar_tablas_intermedias(archivo_pacientes, archivo_codigo, archivo_deste
     """
     pacientes = procesar_pacientes(archivo_pacientes)
     print('scrip proceso json pacientes')
-    examen_rn = procesar_examen_recien_nacido(pacientes)
-    print('scrip proceso json  examen_rn')
-    hosp_diagnostico = procesar_hosp_diagnostico(pacientes)
-    print('scrip proceso json  hosp_diagnostico')
-    antropometrias = procesar_antropometrias(pacientes)
-    print('scrip proceso json  antropometrias')
-    identidad = procesar_identidad(pacientes)
-    print('scrip proceso json  identidad')
-    iden_codigo = procesar_iden_codigo(archivo_codigo)
-    print('scrip proceso json  iden_codigo')
-    e_gest_nacer = procesar_e_gest_al_nacer(pacientes)
-    print('scrip proceso json  e_gest_nacer')
-    tabla_ant_curvas = procesar_tabla_antropometrias_curvas(antropometrias,
-                                                                    identidad,
-                                                                    e_gest_nacer,
-                                                                    examen_rn)
-    tabla_ant_curvas.to_pickle("antropometrias_nacimiento_evoluciones.pkl")
-    print('script guardo tabla_ant_curvas')
-    tabla_pacientes = procesar_tabla_pacientes(identidad,
-                                                iden_codigo,
-                                                hosp_diagnostico)
-    tabla_pacientes.to_pickle("pacientes.pkl")
-    print('script guardo tabla_pacientes')
-    tabla_pacientes_alim_ox = procesar_destete_alimentacion(archivo_destete_alim, tabla_pacientes)
-    tabla_pacientes_alim_ox.to_pickle("pacientes_alim_ox.pkl")
-    print('script guardo tabla_pacientes_alim_ox')
-    create_report()
+    # Los ids eliminados se escriben en el reporte a medida que se procesa cada tabla
+    with open("reporte.txt", "w", encoding='utf-8') as reporte:
+        reporte.write("Filas eliminadas por valores nulos:\n")
+        examen_rn = procesar_examen_recien_nacido(pacientes, reporte)
+        print('scrip proceso json  examen_rn')
+        hosp_diagnostico = procesar_hosp_diagnostico(pacientes, reporte)
+        print('scrip proceso json  hosp_diagnostico')
+        antropometrias = procesar_antropometrias(pacientes, reporte)
+        print('scrip proceso json  antropometrias')
+        identidad = procesar_identidad(pacientes, reporte)
+        print('scrip proceso json  identidad')
+        iden_codigo = procesar_iden_codigo(archivo_codigo, reporte)
+        print('scrip proceso json  iden_codigo')
+        e_gest_nacer = procesar_e_gest_al_nacer(pacientes, reporte)
+        print('scrip proceso json  e_gest_nacer')
+        tabla_ant_curvas = procesar_tabla_antropometrias_curvas(antropometrias,
+                                                                identidad,
+                                                                e_gest_nacer,
+                                                                examen_rn)
+        tabla_ant_curvas.to_parquet("antropometrias_nacimiento_evoluciones.parquet",
+                                    compression='zstd')
+        print('script guardo tabla_ant_curvas')
+        reporte.write("Filas eliminadas por valores duplicados:\n")
+        tabla_pacientes = procesar_tabla_pacientes(identidad,
+                                                   iden_codigo,
+                                                   hosp_diagnostico,
+                                                   reporte)
+        tabla_pacientes.to_parquet("pacientes.parquet", compression='zstd')
+        print('script guardo tabla_pacientes')
+        tabla_pacientes_alim_ox = procesar_destete_alimentacion(archivo_destete_alim,
+                                                                tabla_pacientes,
+                                                                reporte)
+        tabla_pacientes_alim_ox.to_parquet("pacientes_alim_ox.parquet", compression='zstd')
+        print('script guardo tabla_pacientes_alim_ox')
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
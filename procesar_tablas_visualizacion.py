@@ -4,49 +4,40 @@ con los archivos de curvas de Fenton y WHO para crear tablas de los pacientes an
 las antropometrías.
 """
 
-from functools import reduce
 import argparse
+import numpy as np
 import pandas as pd
-from utils import Z_SCORE_COLS, COLORES_RANGOS, leer_datos_curvas
+from utils import Z_SCORE_COLS, COLORES_RANGOS, COLOR_DTYPE, LABEL_DTYPE, leer_datos_curvas
 
 
-def calcular_color_ant(fila_ant, col_ant, cols_z_scores, dicc_color):
-    """
-    Calcula el color de una fila de antropometria segun los rangos de distribucion de 
-    antropometrias de fenton o who
-    - fila_ant: fila con antropometria de pacientes y valores de los z_scores
-    para esa antropometria
-    - col_ant: nombre de la columna del valor de la atropometria
-    - cols_z_scores: nombres de las columnas de los valores de z_scores
-    - dicc_color: diccionario con los colores para los rangos de antropometrias
-    """
-    for i, col_z_score in enumerate(cols_z_scores):
-        if fila_ant[col_ant] < fila_ant[col_z_score]:
-            if i == 0:
-                # Si el valor es menor al primer rango es outlier negativo
-                return dicc_color['outlier_neg'], 'outlier_neg', None
-            llave_color = '_'.join([cols_z_scores[i-1], cols_z_scores[i]])
-            return dicc_color[llave_color], cols_z_scores[i-1], cols_z_scores[i]
-    return dicc_color['outlier_pos'], None, 'outlier_pos'  # Si el valor no esta en los rangos en outlier positivo
-
 def calcular_color_ant_edad(filas_ant, z_scores_df, var_ant, var_z_scores):
     """
     Calcula el color de un df de z_scores para un grupo de edad con fenton o who
     - filas_ant: df con las antropometrias que corresponden a las edades de los z_scores
-    - z_scores_df: df con los valores de los z_scores
+    - z_scores_df: df con los valores de los z_scores indexado por 'days'
     - var_ant: llave de la antropometria a calcular 'AC_Peso', 'AC_Talla',o 'AC_PC'
     - var_z_scores: llave de los z_scores a usar: 'fenton' o 'who'
+    Devuelve tres arreglos alineados con filas_ant con los codigos de COLOR_DTYPE y
+    LABEL_DTYPE del color, limite inferior y limite superior del rango de cada antropometria
     """
-    # si esta por encima o debajo de 5 de se considera un outlier, esta desviacion es aproximada
-    medida_outlier = (z_scores_df['des_1'] - z_scores_df['des_0']) * 5
-    z_scores_df.insert(0, 'outlier_neg', z_scores_df['des_0'] - medida_outlier)
-    z_scores_df['outlier_pos'] = z_scores_df['des_0'] + medida_outlier
-    ant = filas_ant[['AC_EG_Dias', var_ant]].join(z_scores_df.set_index('days'), on='AC_EG_Dias')
-    colores = ant.apply(lambda fila: calcular_color_ant(fila,
-                                                        var_ant,
-                                                        Z_SCORE_COLS[var_z_scores],
-                                                        COLORES_RANGOS[var_z_scores]), axis=1)
-    return colores
+    ant = filas_ant[['AC_EG_Dias', var_ant]].join(z_scores_df, on='AC_EG_Dias')
+    cols_z_scores = Z_SCORE_COLS[var_z_scores]
+    dicc_color = COLORES_RANGOS[var_z_scores]
+    # El rango de cada fila es la posicion del primer z_score mayor al valor
+    # Si el valor es menor al primer z_score es outlier negativo (rango 0) y si no es menor
+    # a ninguno es outlier positivo (rango len(cols_z_scores))
+    menores = ant[[var_ant]].to_numpy(dtype='float64') < ant[cols_z_scores].to_numpy(dtype='float64')
+    rangos = np.where(menores.any(axis=1), menores.argmax(axis=1), len(cols_z_scores))
+    # Codigo del color, limite inferior y limite superior de cada rango (-1 si no tiene)
+    colores_rangos = COLOR_DTYPE.categories.get_indexer(
+        [dicc_color['outlier_neg']]
+        + [dicc_color['_'.join(limites)] for limites in zip(cols_z_scores, cols_z_scores[1:])]
+        + [dicc_color['outlier_pos']]).astype(np.int8)
+    minimos_rangos = LABEL_DTYPE.categories.get_indexer(
+        ['outlier_neg'] + cols_z_scores[:-1] + [None]).astype(np.int8)
+    maximos_rangos = LABEL_DTYPE.categories.get_indexer(
+        [None] + cols_z_scores[1:] + ['outlier_pos']).astype(np.int8)
+    return colores_rangos[rangos], minimos_rangos[rangos], maximos_rangos[rangos]
 
 def calcular_color_antropometrias(z_scores, pacientes, antropometrias):
     """
@@ -66,22 +57,24 @@ def calcular_color_antropometrias(z_scores, pacientes, antropometrias):
 
     ant_rangos = {}
 
+    # Sexo del paciente de cada antropometria y filtros de edad de fenton y who
+    sexo_ant = (antropometrias['Paciente_ID']
+                .map(pacientes.set_index('Paciente_ID')['Iden_Sexo']).to_numpy())
+    edad = antropometrias['AC_EG_Dias'].to_numpy()
+    filtros_edad = {'fenton': edad <= 280, 'who': edad > 280}
+
     for curve_var, z_score_var in variables_curvas_ant.items():
         ant_rangos[curve_var] = {}
         for sex, sex_id in [('ninas', 2), ('ninos', 1)]:
-            sex_patient_ids = pacientes[pacientes['Iden_Sexo'] == sex_id]['Paciente_ID']
-            sex_filter = antropometrias['Paciente_ID'].isin(sex_patient_ids)
+            sex_filter = sexo_ant == sex_id
             ant_rangos[curve_var][sex] = {}
             for datos_percentiles in ['fenton', 'who']:
-                if datos_percentiles == 'fenton':
-                    age_filter = antropometrias['AC_EG_Dias'] <= 280
-                else:
-                    age_filter = antropometrias['AC_EG_Dias'] > 280
-                filas_ant = (antropometrias[sex_filter & age_filter]
-                                            [[curve_var,'AC_EG_Dias']])
-                z_scores_df = z_scores[datos_percentiles][sex][z_score_var].copy()
+                # Se guardan las posiciones de las filas para ubicar los resultados al combinar
+                posiciones = np.flatnonzero(sex_filter & filtros_edad[datos_percentiles])
+                filas_ant = antropometrias[[curve_var,'AC_EG_Dias']].iloc[posiciones]
+                z_scores_df = z_scores[datos_percentiles][sex][z_score_var]
                 colores = calcular_color_ant_edad(filas_ant, z_scores_df, curve_var, datos_percentiles)
-                ant_rangos[curve_var][sex][datos_percentiles] = colores
+                ant_rangos[curve_var][sex][datos_percentiles] = (posiciones, colores)
 
     return ant_rangos
 
@@ -89,16 +82,19 @@ def leer_tablas_intermedias(dir_tablas_intermedias):
     """
     Lee los datos de Karen y otras fuentes pre-procesados por 
     procesar_tablas_intermedias. Este script genera dos tablas:
-    - pacientes.pkl (Con los datos de Nathalie de destete se llama pacientes_alim_ox.pkl)
+    - pacientes.parquet (Con los datos de Nathalie de destete se llama pacientes_alim_ox.parquet)
         - Iden_Sexo, HD_TotalDiasHospital, Iden_Sede, Iden_Codigo, edaddestete,
         oxigenoalaentrada, pesodesteteoxigeno, algoLM3meses, algoLM6meses,
         algoLM40sem, LME40, LME3m, LME6m
-    - antropometrias_nacimiento_evoluciones.pkl : Las antropometrias desde el nacimiento
+    - antropometrias_nacimiento_evoluciones.parquet : Las antropometrias desde el nacimiento
         - AC_Talla, AC_Peso, AC_PC, AC_Num, AC_EG_Dias
     """
-    antropometrias = pd.read_pickle(dir_tablas_intermedias
-                                    + "antropometrias_nacimiento_evoluciones.pkl")
-    pacientes = pd.read_pickle(dir_tablas_intermedias + "pacientes_alim_ox.pkl")
+    antropometrias = pd.read_parquet(dir_tablas_intermedias
+                                     + "antropometrias_nacimiento_evoluciones.parquet")
+    pacientes = pd.read_parquet(dir_tablas_intermedias + "pacientes_alim_ox.parquet")
+    # Las medidas se dejan en float64 porque se comparan con los umbrales de las curvas.
+    # La edad son dias enteros (exactos en float32) y puede tener nulos antes de validar
+    antropometrias['AC_EG_Dias'] = antropometrias['AC_EG_Dias'].astype('float32')
 
     return antropometrias, pacientes
 
@@ -114,27 +110,28 @@ def interpolar_antropometrias(antropometrias):
                                                                 'AC_PC', 
                                                                 'AC_Talla']].mean()
 
-    def interpolar_antropometrias_paciente(antropometrias_paciente):
-        # ID de paciente y semana esstan en el indice
-        id_paciente, semana_min  = antropometrias_paciente.index.min()
-        _, semana_max = antropometrias_paciente.index.max()
-
-        # Crear un MultiIndex con todas los numeros de semanas de antropometrias
-        idx = pd.MultiIndex.from_product([[id_paciente], range(semana_min, semana_max + 1)],
-                                         names=['Paciente_ID', 'Semana'])
-
-        # Reindexar segun el multiindex e interpolar
-        ant_interpoladas = antropometrias_paciente.reindex(idx).interpolate(method='linear')
+    # Rango de semanas de cada paciente, el groupby deja el indice ordenado por paciente y semana
+    semanas = ant_promedio_semanas.index.get_level_values('Semana').to_numpy()
+    limites = (pd.Series(semanas, index=ant_promedio_semanas.index.get_level_values('Paciente_ID'))
+               .groupby(level=0, sort=False).agg(['min', 'max']))
+    num_semanas = (limites['max'] - limites['min'] + 1).to_numpy()
+    inicio_paciente = np.repeat(np.cumsum(num_semanas) - num_semanas, num_semanas)
+    # Posicion de cada semana dentro del rango de su paciente
+    num_semana_paciente = np.arange(num_semanas.sum()) - inicio_paciente
 
-        return ant_interpoladas
+    # Crear un MultiIndex con todas los numeros de semanas de antropometrias de todos los pacientes
+    idx = pd.MultiIndex.from_arrays([np.repeat(limites.index.to_numpy(), num_semanas),
+                                     np.repeat(limites['min'].to_numpy(), num_semanas)
+                                     + num_semana_paciente],
+                                    names=['Paciente_ID', 'Semana'])
 
-    # Apply the interpolation function to each group
-    df_interpolado = pd.concat(interpolar_antropometrias_paciente(grupo) for _,
-                               grupo in ant_promedio_semanas.groupby(level=0))
+    # Reindexar segun el multiindex e interpolar
+    # La primera y ultima semana de cada paciente tienen valores (las antropometrias validadas
+    # no tienen nulos), por lo que la interpolacion no cruza entre pacientes
+    df_interpolado = ant_promedio_semanas.reindex(idx).interpolate(method='linear')
     df_interpolado = df_interpolado.reset_index()
     df_interpolado['AC_EG_Dias'] = df_interpolado['Semana'] * 7
-    df_interpolado = df_interpolado.sort_values(['Paciente_ID', 'AC_EG_Dias'])
-    df_interpolado['AC_Num'] = df_interpolado.groupby('Paciente_ID').cumcount()
+    df_interpolado['AC_Num'] = num_semana_paciente
     return df_interpolado
 
 def validar_antropometrias_pacientes(antropometrias, pacientes):
@@ -148,15 +145,19 @@ def validar_antropometrias_pacientes(antropometrias, pacientes):
     - tiene antropometria 0 u 1 (y no tiene valores nulos en esas antropometrias)
     """
 
-    # Filtros generales antropometrias
-    edad_minima_valida = antropometrias['AC_EG_Dias'] >= 171
-    nacimiento_no_nulo = pd.notnull(antropometrias['AC_EG_Dias'])
-    peso_no_nulo = pd.notnull(antropometrias['AC_Peso'])
-    pc_no_nulo = pd.notnull(antropometrias['AC_PC'])
-    talla_no_nulo = pd.notnull(antropometrias['AC_Talla'])
-    peso_valido = antropometrias['AC_Peso'] > 500
-    pc_valido = antropometrias['AC_PC'] > 15
-    talla_valida = antropometrias['AC_Talla'] > 25
+    # Filtros generales antropometrias, calculados sobre los arreglos de numpy de cada columna
+    edad = antropometrias['AC_EG_Dias'].to_numpy()
+    peso = antropometrias['AC_Peso'].to_numpy()
+    pc = antropometrias['AC_PC'].to_numpy()
+    talla = antropometrias['AC_Talla'].to_numpy()
+    edad_minima_valida = edad >= 171
+    nacimiento_no_nulo = ~np.isnan(edad)
+    peso_no_nulo = ~np.isnan(peso)
+    pc_no_nulo = ~np.isnan(pc)
+    talla_no_nulo = ~np.isnan(talla)
+    peso_valido = peso > 500
+    pc_valido = pc > 15
+    talla_valida = talla > 25
 
     filtros_ant = [ edad_minima_valida, nacimiento_no_nulo,
                     peso_no_nulo , pc_no_nulo , talla_no_nulo,
@@ -166,99 +167,123 @@ def validar_antropometrias_pacientes(antropometrias, pacientes):
                             'peso < 500 gr', 'pc < 15 cm', 'talla < 25 cm']
 
     # Filtrar pacientes segun la antropometria de nacimiento
-    ant_validas = antropometrias[reduce(lambda x, y: x & y, filtros_ant)]
+    ant_validas_mask = np.logical_and.reduce(filtros_ant)
+    ant_validas = antropometrias[ant_validas_mask]
     ant_nac_pacientes = ant_validas[ant_validas['AC_Num'] == 0]['Paciente_ID']
-    ant_nacimiento = pacientes['Paciente_ID'].isin(ant_nac_pacientes)
+    ant_nacimiento = pacientes['Paciente_ID'].isin(ant_nac_pacientes).to_numpy()
     primera_ant_pacientes = ant_validas[ant_validas['AC_Num'] == 1]['Paciente_ID']
-    primera_ant = pacientes['Paciente_ID'].isin(primera_ant_pacientes)
+    primera_ant = pacientes['Paciente_ID'].isin(primera_ant_pacientes).to_numpy()
 
     # Filtros pacientes
-    sexo_valido = pacientes['Iden_Sexo'] != 3
+    sexo_valido = pacientes['Iden_Sexo'].to_numpy() != 3
     filtros_pac = [sexo_valido, ant_nacimiento, primera_ant]
-    pacientes_filtados = pacientes[reduce(lambda x, y: x & y, filtros_pac)]
+    pacientes_filtados = pacientes[np.logical_and.reduce(filtros_pac)]
     nombres_filtros_pac = ["Sexo no es 3",
                             "No tiene antopometria de nacimiento o esta no tiene valores validos",
                             "No tiene anrtopometria de llegada o esta no tiene valores validos"]
 
     # Filtrar antropometrias que se quedaron sin paciente
-    tiene_paciente = antropometrias['Paciente_ID'].isin(pacientes_filtados['Paciente_ID'])
+    tiene_paciente = (antropometrias['Paciente_ID'].isin(pacientes_filtados['Paciente_ID'])
+                      .to_numpy())
     filtros_ant += [tiene_paciente]
     nombres_filtros_ant += ['no tiene datos paciente']
-    ant_filtradas = antropometrias[reduce(lambda x, y: x & y, filtros_ant)]
+    # Las antropometrias filtradas son las validas que tienen paciente
+    ant_filtradas = antropometrias[ant_validas_mask & tiene_paciente]
 
+    # Las filas eliminadas por cada filtro se escriben a partir de sus posiciones
+    id_pacientes = pacientes['Paciente_ID'].to_numpy()
+    id_pacientes_ant = antropometrias['Paciente_ID'].to_numpy()
+    num_ant = antropometrias['AC_Num'].to_numpy()
     with open("reporte_antropometrias.txt", "w", encoding='utf-8') as file:
         for filtro, nombre in zip(filtros_pac, nombres_filtros_pac):
-            eliminados = pacientes[~filtro]
-            file.write(f"Filas pacientes eliminadas por {nombre}: {eliminados.shape[0]}\n")
-            for paciente in eliminados['Paciente_ID'].tolist():
-                file.write(f"paciente con id {paciente} eliminado \n")
+            eliminados = np.flatnonzero(~filtro)
+            file.write(f"Filas pacientes eliminadas por {nombre}: {eliminados.size}\n")
+            file.writelines(f"paciente con id {id_paciente} eliminado \n"
+                            for id_paciente in id_pacientes[eliminados])
         for filtro, nombre in zip(filtros_ant, nombres_filtros_ant):
-            eliminados = antropometrias[~filtro]
-            file.write(f"Filas antropometrias eliminadas por {nombre}: {eliminados.shape[0]}\n")
-            for ant in eliminados[['Paciente_ID', 'AC_Num']].to_dict('records'):
-                file.write(f"ant {ant['AC_Num']} de paciente {ant['Paciente_ID']} eliminada\n")
+            eliminados = np.flatnonzero(~filtro)
+            file.write(f"Filas antropometrias eliminadas por {nombre}: {eliminados.size}\n")
+            file.writelines(f"ant {num} de paciente {id_paciente} eliminada\n"
+                            for num, id_paciente in zip(num_ant[eliminados].tolist(),
+                                                        id_pacientes_ant[eliminados]))
 
     return ant_filtradas, pacientes_filtados
 
+def crear_bandera_percentil_10(pacientes, antropometrias, percentiles, num_ant, prefijo):
+    """
+    Crea una bandera por variable (prefijo + Peso, Talla, PC) para los pacientes que se
+    encuentran por debajo del percentil 10 de fenton en la antropometria num_ant
+    - num_ant: 'AC_Num' de la antropometria a comparar
+    - prefijo: prefijo del nombre de las columnas de las banderas
+    """
+    variables = [('Peso', 'peso'), ('Talla', 'talla'), ('PC', 'pc')]
+    # Percentil 10 de fenton por sexo y dia para las tres variables en una sola tabla
+    percentiles_10 = pd.concat({
+        id_sexo: pd.concat({fenton_var: percentiles['fenton'][sexo][fenton_var]
+                                        .set_index('days')['10']
+                            for _, fenton_var in variables}, axis=1)
+        for sexo, id_sexo in [('ninas', 2), ('ninos', 1)]
+    }, names=['Iden_Sexo', 'AC_EG_Dias'])
+    # Un solo merge de las antropometrias con el sexo del paciente y los percentiles
+    ant = antropometrias.loc[antropometrias['AC_Num'].to_numpy() == num_ant,
+                             ['Paciente_ID', 'AC_EG_Dias', 'AC_Peso', 'AC_Talla', 'AC_PC']]
+    ant = ant.merge(pacientes[['Paciente_ID', 'Iden_Sexo']], on='Paciente_ID')
+    ant = ant.join(percentiles_10, on=['Iden_Sexo', 'AC_EG_Dias'])
+    id_pacientes_ant = ant['Paciente_ID'].to_numpy()
+    for ant_var, fenton_var in variables:
+        bajo_percentil = ant['AC_' + ant_var].to_numpy() < ant[fenton_var].to_numpy()
+        pacientes[prefijo + ant_var] = (pacientes['Paciente_ID']
+                                        .isin(id_pacientes_ant[bajo_percentil]))
+    return pacientes
+
 def crear_bandera_rciu(pacientes, antropometrias, percentiles):
     """
     Crea una bandera para los pacientes que se encuentran por debajo del percentil 10 
     de fenton en la antropometria de nacimiento ('AC_Num' es 0)
     """
-    for ant_var, fenton_var in [('Peso', 'peso'), ('Talla', 'talla'), ('PC', 'pc')]:
-        nombre_col = "RCIU_" + ant_var
-        pacientes[nombre_col] = False
-        for sexo, id_sexo in [('ninas', 2), ('ninos', 1)]:
-            var = 'AC_' + ant_var
-            pacientes_sexo = pacientes[pacientes['Iden_Sexo'] == id_sexo]['Paciente_ID']
-            ant = antropometrias[(antropometrias['Paciente_ID'].isin(pacientes_sexo))
-                                & (antropometrias['AC_Num'] == 0)][[var,'AC_EG_Dias','Paciente_ID']]
-            ant_comp_df = ant.join(percentiles['fenton'][sexo][fenton_var]
-                                   .set_index('days')[['10']],
-                                   on='AC_EG_Dias')
-            pacientes_rciu = (ant_comp_df[ant_comp_df[var] < ant_comp_df['10']])['Paciente_ID']
-            pacientes.loc[pacientes['Paciente_ID'].isin(pacientes_rciu), nombre_col] = True
-    return pacientes
+    return crear_bandera_percentil_10(pacientes, antropometrias, percentiles, 0, "RCIU_")
 
 def crear_bandera_rceu(pacientes, antropometrias, percentiles):
     """
     Crea una bandera para los pacientes que se encuentran por debajo del percentil 10 
     de fenton en la antropometria de llegada a canguro ('AC_Num' es 1)
+    Las banderas se calculan para niñas y niños con el percentil de su sexo, un valor igual
+    al percentil no queda por debajo
+
+    >>> percentiles = {'fenton': {sexo: {var: pd.DataFrame({'days': [200], '10': [p10]})
+    ...                                  for var in ['peso', 'talla', 'pc']}
+    ...                           for sexo, p10 in [('ninas', 10.0), ('ninos', 15.0)]}}
+    >>> pacientes = pd.DataFrame({'Paciente_ID': ['a', 'b', 'c'], 'Iden_Sexo': [1, 2, 1]})
+    >>> ant = pd.DataFrame({'Paciente_ID': ['a', 'b', 'c'], 'AC_Num': [1, 1, 1],
+    ...                     'AC_EG_Dias': [200.0, 200.0, 200.0],
+    ...                     'AC_Peso': [12.0, 12.0, 15.0], 'AC_Talla': [20.0, 5.0, 14.9],
+    ...                     'AC_PC': [14.0, 10.0, 30.0]})
+    >>> crear_bandera_rceu(pacientes, ant, percentiles)
+      Paciente_ID  Iden_Sexo  RCEU_Peso  RCEU_Talla  RCEU_PC
+    0           a          1       True       False     True
+    1           b          2      False        True    False
+    2           c          1      False        True    False
     """
-    for ant_var, fenton_var in [('Peso', 'peso'), ('Talla', 'talla'), ('PC', 'pc')]:
-        nombre_col = "RCEU_" + ant_var
-        pacientes[nombre_col] = False
-        for sexo, id_sexo in [('ninas', 2), ('ninos', 1)]:
-            var = 'AC_' + ant_var
-            pacientes_sexo = pacientes[pacientes['Iden_Sexo'] == id_sexo]['Paciente_ID']
-            ant = antropometrias[(antropometrias['Paciente_ID'].isin(pacientes_sexo))
-                                & (antropometrias['AC_Num'] == 1)][[var,'AC_EG_Dias','Paciente_ID']]
-            ant_comp_df = ant.join(percentiles['fenton'][sexo][fenton_var]
-                                    .set_index('days')[['10']],
-                                    on='AC_EG_Dias')
-            pacientes_rceu = (ant_comp_df[ant_comp_df[var] < ant_comp_df['10']]).index
-            pacientes.loc[pacientes.index.isin(pacientes_rceu), nombre_col] = True
-        return pacientes
+    return crear_bandera_percentil_10(pacientes, antropometrias, percentiles, 1, "RCEU_")
 
 def combinar_rangos_antropometrias(ant_rangos, ant_interpoladas):
     """
     Concatenar todos los labels en un df
     """
-    var_ants = {}
+    data = {}
     for curve_var in ['AC_Peso','AC_Talla','AC_PC']:
-        ants = []
+        # Codigos de color, min y max prealocados para todas las antropometrias
+        columnas = [np.full(len(ant_interpoladas), -1, dtype=np.int8) for _ in range(3)]
         for sex in ['ninas','ninos']:
             for datos_percentiles in ['fenton', 'who']:
-                # Extrayendo resultados como DataFrame
-                resultados = ant_rangos[curve_var][sex][datos_percentiles]
-                # Separando los resultados en columnas individuales
-                df_resultados = pd.DataFrame(resultados.tolist(), columns=[f"{curve_var}_color", f"{curve_var}_min", f"{curve_var}_max"], index=resultados.index)
-                ants.append(df_resultados)
-        var_ants[curve_var] = pd.concat(ants)
+                posiciones, resultados = ant_rangos[curve_var][sex][datos_percentiles]
+                for columna, resultado in zip(columnas, resultados):
+                    columna[posiciones] = resultado
+        for sufijo, columna, dtype in zip(['color', 'min', 'max'], columnas,
+                                          [COLOR_DTYPE, LABEL_DTYPE, LABEL_DTYPE]):
+            data[f"{curve_var}_{sufijo}"] = pd.Categorical.from_codes(columna, dtype=dtype)
 
-    # Concatenar todas las columnas de resultados
-    data = pd.concat([var_ants[curve_var] for curve_var in ['AC_Peso', 'AC_Talla', 'AC_PC']], axis=1)
-    return ant_interpoladas.join(data)
+    return ant_interpoladas.join(pd.DataFrame(data, index=ant_interpoladas.index))
 
 def procesar_tablas_visualizacion(dir_tablas_intermedias, dir_datos_crecimiento):
     """
@@ -272,7 +297,7 @@ def procesar_tablas_visualizacion(dir_tablas_intermedias, dir_datos_crecimiento)
     ant_interpoladas = interpolar_antropometrias(antropometrias)
     ant_rangos = calcular_color_antropometrias(z_scores, pacientes, ant_interpoladas)
     ant_interpoladas_rangos = combinar_rangos_antropometrias(ant_rangos, ant_interpoladas)
-    ant_interpoladas_rangos.to_pickle("ant_interpoladas_rangos.pkl")
+    ant_interpoladas_rangos.to_parquet("ant_interpoladas_rangos.parquet", compression='zstd')
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -2,6 +2,8 @@
 Este módulo contiene constantes usadas en los diferentes programas
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 
 Z_SCORE_COLS = {
@@ -34,12 +36,18 @@ COLORES_RANGOS = {
     }
 }
 
+# Tipos categoricos de las columnas de color y de limites de rango de las antropometrias
+COLOR_DTYPE = pd.CategoricalDtype(sorted({color for colores in COLORES_RANGOS.values()
+                                          for color in colores.values()}))
+LABEL_DTYPE = pd.CategoricalDtype(['outlier_neg'] + Z_SCORE_COLS['fenton'] + ['outlier_pos'])
+
 def leer_datos_curvas(dir_datos_crecimiento):
     """
     Lee los datos de creicimiento de fenton y who guardados en dir_datos_creimiento
     Los archivos deben tener la siguiente esctructura
     curvas_(desviaciones/percentiles)_(who/fenton)/
         (z_scores/percentiles)_(pc/talla/peso)_(ninos/ninas)_(who/fenton).csv
+    Los z_scores quedan indexados por 'days' y con las columnas outlier_neg y outlier_pos
     """
 
     folder = dir_datos_crecimiento + "/curvas"
@@ -64,11 +72,34 @@ def leer_datos_curvas(dir_datos_crecimiento):
         }
     }
 
-    for var in growth_vars:
-        for sex in ["ninos", "ninas"]:
-            for curve in ["fenton", "who"]:
-                name = f"{folder}_desviaciones_{curve}/z_scores_{var}_{sex}_{curve}.csv"
-                z_scores[curve][sex][var] = pd.read_csv(name, index_col=0)
+    # Las lecturas son independientes, se hacen en paralelo con hilos
+    # Los percentiles solo existen para fenton, se leen una vez por variable y sexo
+    lecturas = []
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for var in growth_vars:
+            for sex in ["ninos", "ninas"]:
+                for curve in ["fenton", "who"]:
+                    name = f"{folder}_desviaciones_{curve}/z_scores_{var}_{sex}_{curve}.csv"
+                    lecturas.append((z_scores[curve][sex], var,
+                                     executor.submit(pd.read_csv, name, index_col=0)))
                 name = f"{folder}_percentiles_fenton/percentiles_{var}_{sex}_fenton.csv"
-                percentiles["fenton"][sex][var] = pd.read_csv(name, index_col=0)
+                lecturas.append((percentiles["fenton"][sex], var,
+                                 executor.submit(pd.read_csv, name, index_col=0)))
+    for destino, var, lectura in lecturas:
+        destino[var] = lectura.result()
+    for z_scores_curva in z_scores.values():
+        for z_scores_sexo in z_scores_curva.values():
+            for var, z_scores_df in z_scores_sexo.items():
+                z_scores_sexo[var] = agregar_outliers_z_scores(z_scores_df)
     return z_scores, percentiles
+
+def agregar_outliers_z_scores(z_scores_df):
+    """
+    Agrega los limites de outliers a un df de z_scores y lo indexa por 'days'
+    - outlier_neg / outlier_pos: si esta por encima o debajo de 5 de se considera un outlier,
+      esta desviacion es aproximada
+    """
+    medida_outlier = (z_scores_df['des_1'] - z_scores_df['des_0']) * 5
+    z_scores_df.insert(0, 'outlier_neg', z_scores_df['des_0'] - medida_outlier)
+    z_scores_df['outlier_pos'] = z_scores_df['des_0'] + medida_outlier
+    return z_scores_df.set_index('days')